@@ -4,297 +4,434 @@ AWS Architecture Diagram Generator for Modern Voting App
 Creates a visual representation of the AWS deployment architecture
 """
 
+import matplotlib
+if __name__ in ('__main__', '__mp_main__'):
+    # Scripted runs (and their worker processes) render off-screen with Agg so no GUI
+    # backend or event loop is initialised; importers keep their own backend for previews
+    matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+import matplotlib.colors as mcolors
 import matplotlib.patches as patches
-from matplotlib.patches import FancyBboxPatch, ConnectionPatch
+from matplotlib.patches import BoxStyle, FancyBboxPatch, ConnectionPatch, Rectangle
+from matplotlib.font_manager import FontProperties
+from matplotlib.textpath import TextPath
+from matplotlib.collections import LineCollection, PatchCollection, PathCollection, PolyCollection
 import numpy as np
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from string import Template
+from xml.sax.saxutils import escape
 
-def create_aws_architecture_diagram():
-    # Create figure and axis
-    fig, ax = plt.subplots(1, 1, figsize=(16, 12))
+try:
+    import graphviz
+except ImportError:  # optional: only needed for --backend graphviz
+    graphviz = None
+
+try:
+    import cairosvg
+except (ImportError, OSError):  # optional, and needs the cairo library; only used for png from the template
+    cairosvg = None
+
+plt.ioff()
+
+COLORS = {
+    'aws_orange': '#FF9900',
+    'aws_blue': '#232F3E',
+    'vpc_blue': '#4A90E2',
+    'public_green': '#7ED321',
+    'private_orange': '#F5A623',
+    'database_purple': '#9013FE',
+    'cache_red': '#D0021B',
+    'container_teal': '#50E3C2',
+    'load_balancer': '#BD10E0',
+    'monitoring': '#B8E986',
+    'az_fill': '#F9F9F9'
+}
+
+# Box styles are built once and shared instead of reparsing "round,pad=..." per patch
+_BOX05 = BoxStyle("Round", pad=0.05)
+_BOX10 = BoxStyle("Round", pad=0.1)
+_BOX20 = BoxStyle("Round", pad=0.2)
+_BOX30 = BoxStyle("Round", pad=0.3)
+
+# Font lookups are resolved once per style and shared by every label
+FP_BOLD_20 = FontProperties(size=20, weight='bold')
+FP_BOLD_18 = FontProperties(size=18, weight='bold')
+FP_BOLD_14 = FontProperties(size=14, weight='bold')
+FP_BOLD_12 = FontProperties(size=12, weight='bold')
+FP_BOLD_10 = FontProperties(size=10, weight='bold')
+FP_BOLD_9 = FontProperties(size=9, weight='bold')
+FP_BOLD_8 = FontProperties(size=8, weight='bold')
+FP_BOLD_7 = FontProperties(size=7, weight='bold')
+FP_10 = FontProperties(size=10)
+FP_9 = FontProperties(size=9)
+FP_8 = FontProperties(size=8)
+
+# Diagrams are written next to this script
+OUTPUT_DIR = os.path.dirname(os.path.abspath(__file__))
+ARCH_NAME = 'aws-architecture'
+FLOW_NAME = 'data-flow-diagram'
+TEMPLATE_PATH = os.path.join(OUTPUT_DIR, f'{ARCH_NAME}.template.svg')
+
+# Labels that may change between builds; everything else in the architecture is fixed
+ARCH_LABELS = {
+    'title': 'Modern Voting App - AWS Architecture',
+    'vpc': 'VPC (10.0.0.0/16)',
+}
+
+def blend(color, alpha, background=COLORS['az_fill']):
+    """Pre-blend a translucent color over its background so the patch can be drawn opaque"""
+    rgb = np.array(mcolors.to_rgb(color))
+    return tuple(rgb * alpha + np.array(mcolors.to_rgb(background)) * (1 - alpha))
+
+def blend_hex(color, alpha, background=COLORS['az_fill']):
+    """blend() as a #rrggbb string, for backends that don't take RGB tuples"""
+    return mcolors.to_hex(blend(color, alpha, background))
+
+# Subnets and legend chips sit on the Availability Zone fill; their edges used to
+# inherit the fill alpha as well
+SUBNET_EDGE = blend('black', 0.3)
+LEGEND_EDGE = blend('black', 0.7)
+SUBNET_EDGE_HEX = mcolors.to_hex(SUBNET_EDGE)
+
+def box_group(centers, width, height, facecolor):
+    """One PatchCollection of identical boxes centred on each row of centers"""
+    corners = np.asarray(centers, dtype=float) - [width / 2, height / 2]
+    boxes = [Rectangle(corner, width, height) for corner in corners]
+    return PatchCollection(boxes, facecolor=facecolor, edgecolor='black', antialiased=False)
+
+def draw_arrows(ax, starts, ends, colors, linewidths, head_length=0.18, head_width=0.14):
+    """Draw straight arrows as one LineCollection of shafts and one PolyCollection of heads"""
+    starts = np.asarray(starts, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+    
+    # Unit direction and normal for every arrow at once
+    delta = ends - starts
+    angles = np.arctan2(delta[:, 1], delta[:, 0])
+    direction = np.column_stack([np.cos(angles), np.sin(angles)])
+    normal = np.column_stack([-direction[:, 1], direction[:, 0]])
+    
+    # Shafts stop at the base of the head so the tip stays sharp
+    bases = ends - direction * head_length
+    shafts = np.stack([starts, bases], axis=1)
+    heads = np.stack([ends,
+                      bases + normal * (head_width / 2),
+                      bases - normal * (head_width / 2)], axis=1)
+    
+    # Arrows may point at boxes outside the axes limits, so don't clip them
+    ax.add_collection(LineCollection(shafts, colors=colors, linewidths=linewidths,
+                                     zorder=2, clip_on=False))
+    ax.add_collection(PolyCollection(heads, facecolors=colors, edgecolors='none',
+                                     zorder=2, clip_on=False))
+
+def _prepare_figure(fig, figsize):
+    """Return a blank figure of the given size, clearing and reusing fig if one is passed"""
+    if fig is None:
+        return plt.figure(figsize=figsize)
+    fig.clear()
+    fig.set_size_inches(figsize)
+    return fig
+
+def _architecture_axes(fig=None):
+    """Create the figure and axes shared by the architecture renderers"""
+    fig = _prepare_figure(fig, (16, 12))
+    ax = fig.add_subplot(111)
+    # savefig(bbox_inches='tight') crops the output, so no layout pass is needed
+    fig.subplots_adjust(left=0, right=1, top=1, bottom=0)
     ax.set_xlim(0, 16)
     ax.set_ylim(0, 12)
     ax.axis('off')
-    
-    # Define colors
-    colors = {
-        'aws_orange': '#FF9900',
-        'aws_blue': '#232F3E',
-        'vpc_blue': '#4A90E2',
-        'public_green': '#7ED321',
-        'private_orange': '#F5A623',
-        'database_purple': '#9013FE',
-        'cache_red': '#D0021B',
-        'container_teal': '#50E3C2',
-        'load_balancer': '#BD10E0',
-        'monitoring': '#B8E986'
-    }
+    return fig, ax
+
+def _draw_static(ax, labels=ARCH_LABELS):
+    """Draw the parts of the architecture that never change: boundaries, subnets, legend"""
+    # Boxes are collected here and added to the axes as a single collection
+    patches_list = []
     
     # Title
-    ax.text(8, 11.5, 'Modern Voting App - AWS Architecture', 
-            fontsize=20, fontweight='bold', ha='center', color=colors['aws_blue'])
+    ax.text(8, 11.5, labels['title'], 
+            fontproperties=FP_BOLD_20, ha='center', color=COLORS['aws_blue'])
     
     # AWS Cloud boundary
     aws_cloud = FancyBboxPatch((0.5, 0.5), 15, 10.5, 
-                               boxstyle="round,pad=0.1", 
+                               boxstyle=_BOX10, 
                                facecolor='#F0F8FF', 
-                               edgecolor=colors['aws_orange'], 
-                               linewidth=3)
-    ax.add_patch(aws_cloud)
-    ax.text(1, 10.8, 'AWS Cloud', fontsize=14, fontweight='bold', color=colors['aws_orange'])
+                               edgecolor=COLORS['aws_orange'], 
+                               linewidth=3, 
+                               antialiased=False)
+    patches_list.append(aws_cloud)
+    ax.text(1, 10.8, 'AWS Cloud', fontproperties=FP_BOLD_14, color=COLORS['aws_orange'])
     
     # VPC
     vpc = FancyBboxPatch((1, 1), 14, 9.5, 
-                         boxstyle="round,pad=0.1", 
+                         boxstyle=_BOX10, 
                          facecolor='#E8F4FD', 
-                         edgecolor=colors['vpc_blue'], 
-                         linewidth=2)
-    ax.add_patch(vpc)
-    ax.text(1.5, 10.2, 'VPC (10.0.0.0/16)', fontsize=12, fontweight='bold', color=colors['vpc_blue'])
+                         edgecolor=COLORS['vpc_blue'], 
+                         linewidth=2, 
+                         antialiased=False)
+    patches_list.append(vpc)
+    ax.text(1.5, 10.2, labels['vpc'], fontproperties=FP_BOLD_12, color=COLORS['vpc_blue'])
     
     # Availability Zones
     az1 = FancyBboxPatch((1.5, 1.5), 6, 8.5, 
-                         boxstyle="round,pad=0.05", 
-                         facecolor='#F9F9F9', 
+                         boxstyle=_BOX05, 
+                         facecolor=COLORS['az_fill'], 
                          edgecolor='gray', 
-                         linewidth=1, linestyle='--')
-    ax.add_patch(az1)
-    ax.text(1.8, 9.7, 'Availability Zone A', fontsize=10, color='gray')
+                         linewidth=1, linestyle='--', 
+                         antialiased=False)
+    patches_list.append(az1)
+    ax.text(1.8, 9.7, 'Availability Zone A', fontproperties=FP_10, color='gray')
     
     az2 = FancyBboxPatch((8.5, 1.5), 6, 8.5, 
-                         boxstyle="round,pad=0.05", 
-                         facecolor='#F9F9F9', 
+                         boxstyle=_BOX05, 
+                         facecolor=COLORS['az_fill'], 
                          edgecolor='gray', 
-                         linewidth=1, linestyle='--')
-    ax.add_patch(az2)
-    ax.text(8.8, 9.7, 'Availability Zone B', fontsize=10, color='gray')
-    
-    # Internet Gateway
-    igw = FancyBboxPatch((7, 10.5), 2, 0.8, 
-                         boxstyle="round,pad=0.05", 
-                         facecolor=colors['aws_orange'], 
-                         edgecolor='black')
-    ax.add_patch(igw)
-    ax.text(8, 10.9, 'Internet\nGateway', fontsize=9, ha='center', va='center', color='white', fontweight='bold')
-    
-    # Application Load Balancer
-    alb = FancyBboxPatch((6.5, 8.5), 3, 0.8, 
-                         boxstyle="round,pad=0.05", 
-                         facecolor=colors['load_balancer'], 
-                         edgecolor='black')
-    ax.add_patch(alb)
-    ax.text(8, 8.9, 'Application Load Balancer', fontsize=9, ha='center', va='center', color='white', fontweight='bold')
+                         linewidth=1, linestyle='--', 
+                         antialiased=False)
+    patches_list.append(az2)
+    ax.text(8.8, 9.7, 'Availability Zone B', fontproperties=FP_10, color='gray')
     
     # Public Subnets
-    pub_subnet1 = FancyBboxPatch((2, 7.5), 5, 1.5, 
-                                 boxstyle="round,pad=0.05", 
-                                 facecolor=colors['public_green'], 
-                                 edgecolor='black', alpha=0.3)
-    ax.add_patch(pub_subnet1)
-    ax.text(2.2, 8.7, 'Public Subnet A\n10.0.1.0/24', fontsize=9, color='black', fontweight='bold')
-    
-    pub_subnet2 = FancyBboxPatch((9, 7.5), 5, 1.5, 
-                                 boxstyle="round,pad=0.05", 
-                                 facecolor=colors['public_green'], 
-                                 edgecolor='black', alpha=0.3)
-    ax.add_patch(pub_subnet2)
-    ax.text(9.2, 8.7, 'Public Subnet B\n10.0.2.0/24', fontsize=9, color='black', fontweight='bold')
+    pub_subnet1 = Rectangle((2, 7.5), 5, 1.5, 
+                            facecolor=blend(COLORS['public_green'], 0.3), 
+                            edgecolor=SUBNET_EDGE, 
+                            antialiased=False)
+    patches_list.append(pub_subnet1)
+    ax.text(2.2, 8.7, 'Public Subnet A\n10.0.1.0/24', fontproperties=FP_BOLD_9, color='black')
+    
+    pub_subnet2 = Rectangle((9, 7.5), 5, 1.5, 
+                            facecolor=blend(COLORS['public_green'], 0.3), 
+                            edgecolor=SUBNET_EDGE, 
+                            antialiased=False)
+    patches_list.append(pub_subnet2)
+    ax.text(9.2, 8.7, 'Public Subnet B\n10.0.2.0/24', fontproperties=FP_BOLD_9, color='black')
     
     # Private Subnets - App Tier
-    priv_app1 = FancyBboxPatch((2, 5.5), 5, 1.5, 
-                               boxstyle="round,pad=0.05", 
-                               facecolor=colors['private_orange'], 
-                               edgecolor='black', alpha=0.3)
-    ax.add_patch(priv_app1)
-    ax.text(2.2, 6.7, 'Private Subnet A (App)\n10.0.3.0/24', fontsize=9, color='black', fontweight='bold')
-    
-    priv_app2 = FancyBboxPatch((9, 5.5), 5, 1.5, 
-                               boxstyle="round,pad=0.05", 
-                               facecolor=colors['private_orange'], 
-                               edgecolor='black', alpha=0.3)
-    ax.add_patch(priv_app2)
-    ax.text(9.2, 6.7, 'Private Subnet B (App)\n10.0.4.0/24', fontsize=9, color='black', fontweight='bold')
+    priv_app1 = Rectangle((2, 5.5), 5, 1.5, 
+                          facecolor=blend(COLORS['private_orange'], 0.3), 
+                          edgecolor=SUBNET_EDGE, 
+                          antialiased=False)
+    patches_list.append(priv_app1)
+    ax.text(2.2, 6.7, 'Private Subnet A (App)\n10.0.3.0/24', fontproperties=FP_BOLD_9, color='black')
+    
+    priv_app2 = Rectangle((9, 5.5), 5, 1.5, 
+                          facecolor=blend(COLORS['private_orange'], 0.3), 
+                          edgecolor=SUBNET_EDGE, 
+                          antialiased=False)
+    patches_list.append(priv_app2)
+    ax.text(9.2, 6.7, 'Private Subnet B (App)\n10.0.4.0/24', fontproperties=FP_BOLD_9, color='black')
     
     # Private Subnets - Database Tier
-    priv_db1 = FancyBboxPatch((2, 3.5), 5, 1.5, 
-                              boxstyle="round,pad=0.05", 
-                              facecolor=colors['database_purple'], 
-                              edgecolor='black', alpha=0.3)
-    ax.add_patch(priv_db1)
-    ax.text(2.2, 4.7, 'Private Subnet A (DB)\n10.0.5.0/24', fontsize=9, color='white', fontweight='bold')
-    
-    priv_db2 = FancyBboxPatch((9, 3.5), 5, 1.5, 
-                              boxstyle="round,pad=0.05", 
-                              facecolor=colors['database_purple'], 
-                              edgecolor='black', alpha=0.3)
-    ax.add_patch(priv_db2)
-    ax.text(9.2, 4.7, 'Private Subnet B (DB)\n10.0.6.0/24', fontsize=9, color='white', fontweight='bold')
-    
-    # ECS Services
-    # Vote App
-    vote_service = FancyBboxPatch((2.5, 5.8), 1.8, 0.6, 
-                                  boxstyle="round,pad=0.02", 
-                                  facecolor=colors['container_teal'], 
-                                  edgecolor='black')
-    ax.add_patch(vote_service)
-    ax.text(3.4, 6.1, 'Vote App\n(ECS)', fontsize=8, ha='center', va='center', fontweight='bold')
-    
-    # Result App
-    result_service = FancyBboxPatch((9.5, 5.8), 1.8, 0.6, 
-                                    boxstyle="round,pad=0.02", 
-                                    facecolor=colors['container_teal'], 
-                                    edgecolor='black')
-    ax.add_patch(result_service)
-    ax.text(10.4, 6.1, 'Result App\n(ECS)', fontsize=8, ha='center', va='center', fontweight='bold')
-    
-    # Worker Service
-    worker_service = FancyBboxPatch((5.5, 5.8), 1.8, 0.6, 
-                                    boxstyle="round,pad=0.02", 
-                                    facecolor=colors['container_teal'], 
-                                    edgecolor='black')
-    ax.add_patch(worker_service)
-    ax.text(6.4, 6.1, 'Worker\n(ECS)', fontsize=8, ha='center', va='center', fontweight='bold')
+    priv_db1 = Rectangle((2, 3.5), 5, 1.5, 
+                         facecolor=blend(COLORS['database_purple'], 0.3), 
+                         edgecolor=SUBNET_EDGE, 
+                         antialiased=False)
+    patches_list.append(priv_db1)
+    ax.text(2.2, 4.7, 'Private Subnet A (DB)\n10.0.5.0/24', fontproperties=FP_BOLD_9, color='white')
+    
+    priv_db2 = Rectangle((9, 3.5), 5, 1.5, 
+                         facecolor=blend(COLORS['database_purple'], 0.3), 
+                         edgecolor=SUBNET_EDGE, 
+                         antialiased=False)
+    patches_list.append(priv_db2)
+    ax.text(9.2, 4.7, 'Private Subnet B (DB)\n10.0.6.0/24', fontproperties=FP_BOLD_9, color='white')
+    
+    # Legend
+    legend_y = 2.5
+    ax.text(1.5, legend_y, 'Legend:', fontproperties=FP_BOLD_12)
+    
+    # Legend items
+    legend_items = [
+        ('Public Subnet', COLORS['public_green']),
+        ('Private App Subnet', COLORS['private_orange']),
+        ('Private DB Subnet', COLORS['database_purple']),
+        ('ECS Services', COLORS['container_teal']),
+        ('Cache/Database', COLORS['cache_red']),
+        ('AWS Services', COLORS['aws_orange'])
+    ]
+    
+    # Boundaries and subnets flatten to one image in svg/pdf output; text and services stay vector
+    ax.add_collection(PatchCollection(patches_list, match_original=True, rasterized=True))
+    
+    # Legend rows are laid out in one go and their chips drawn as a single collection
+    ys = legend_y - 0.3 - np.arange(len(legend_items)) * 0.25
+    boxes = [Rectangle((1.5, y - 0.05), 0.3, 0.15, facecolor=blend(color, 0.7), edgecolor=LEGEND_EDGE,
+                       antialiased=False)
+             for (_, color), y in zip(legend_items, ys)]
+    ax.add_collection(PatchCollection(boxes, match_original=True))
+    
+    # Labels share one style, so they are drawn as glyph outlines in a single PathCollection
+    # rather than one Text artist each. The axes span one data unit per inch, so a 9pt font
+    # is 9/72 units tall; rows are centred like va='center'.
+    size = FP_9.get_size_in_points() / 72
+    ref = TextPath((0, 0), 'Ag', size=size, prop=FP_9).get_extents()
+    dy = (ref.y0 + ref.y1) / 2
+    paths = [TextPath((2, y - dy), label, size=size, prop=FP_9)
+             for (label, _), y in zip(legend_items, ys)]
+    ax.add_collection(PathCollection(paths, facecolors='black', edgecolors='none'))
+
+def _draw_dynamic(ax):
+    """Draw the services and connections on top of the static layout"""
+    patches_list = []
+    
+    # Internet Gateway
+    igw = Rectangle((7, 10.5), 2, 0.8, 
+                    facecolor=COLORS['aws_orange'], 
+                    edgecolor='black', 
+                    antialiased=False)
+    patches_list.append(igw)
+    ax.text(8, 10.9, 'Internet\nGateway', fontproperties=FP_BOLD_9, ha='center', va='center', color='white')
+    
+    # Application Load Balancer
+    alb = Rectangle((6.5, 8.5), 3, 0.8, 
+                    facecolor=COLORS['load_balancer'], 
+                    edgecolor='black', 
+                    antialiased=False)
+    patches_list.append(alb)
+    ax.text(8, 8.9, 'Application Load Balancer', fontproperties=FP_BOLD_9, ha='center', va='center', color='white')
+    
+    # ECS Services: Vote App, Worker, Result App share one size and style
+    ecs_centers = np.array([[3.4, 6.1], [6.4, 6.1], [10.4, 6.1]])
+    ax.add_collection(box_group(ecs_centers, 1.8, 0.6, COLORS['container_teal']))
+    for (x, y), text in zip(ecs_centers, ['Vote App\n(ECS)', 'Worker\n(ECS)', 'Result App\n(ECS)']):
+        ax.text(x, y, text, fontproperties=FP_BOLD_8, ha='center', va='center')
     
     # ElastiCache Redis
-    redis = FancyBboxPatch((2.5, 3.8), 2, 0.6, 
-                           boxstyle="round,pad=0.02", 
-                           facecolor=colors['cache_red'], 
-                           edgecolor='black')
-    ax.add_patch(redis)
-    ax.text(3.5, 4.1, 'ElastiCache\nRedis', fontsize=8, ha='center', va='center', color='white', fontweight='bold')
+    redis = Rectangle((2.5, 3.8), 2, 0.6, 
+                      facecolor=COLORS['cache_red'], 
+                      edgecolor='black', 
+                      antialiased=False)
+    patches_list.append(redis)
+    ax.text(3.5, 4.1, 'ElastiCache\nRedis', fontproperties=FP_BOLD_8, ha='center', va='center', color='white')
     
     # RDS PostgreSQL
-    postgres = FancyBboxPatch((9.5, 3.8), 2, 0.6, 
-                              boxstyle="round,pad=0.02", 
-                              facecolor=colors['database_purple'], 
-                              edgecolor='black')
-    ax.add_patch(postgres)
-    ax.text(10.5, 4.1, 'RDS\nPostgreSQL', fontsize=8, ha='center', va='center', color='white', fontweight='bold')
+    postgres = Rectangle((9.5, 3.8), 2, 0.6, 
+                         facecolor=COLORS['database_purple'], 
+                         edgecolor='black', 
+                         antialiased=False)
+    patches_list.append(postgres)
+    ax.text(10.5, 4.1, 'RDS\nPostgreSQL', fontproperties=FP_BOLD_8, ha='center', va='center', color='white')
     
     # CloudWatch
-    cloudwatch = FancyBboxPatch((12.5, 5.8), 1.8, 0.6, 
-                                boxstyle="round,pad=0.02", 
-                                facecolor=colors['monitoring'], 
-                                edgecolor='black')
-    ax.add_patch(cloudwatch)
-    ax.text(13.4, 6.1, 'CloudWatch\nLogs/Metrics', fontsize=8, ha='center', va='center', fontweight='bold')
+    cloudwatch = Rectangle((12.5, 5.8), 1.8, 0.6, 
+                           facecolor=COLORS['monitoring'], 
+                           edgecolor='black', 
+                           antialiased=False)
+    patches_list.append(cloudwatch)
+    ax.text(13.4, 6.1, 'CloudWatch\nLogs/Metrics', fontproperties=FP_BOLD_8, ha='center', va='center')
     
     # ECR
-    ecr = FancyBboxPatch((12.5, 7.8), 1.8, 0.6, 
-                         boxstyle="round,pad=0.02", 
-                         facecolor=colors['aws_orange'], 
-                         edgecolor='black')
-    ax.add_patch(ecr)
-    ax.text(13.4, 8.1, 'ECR\nContainer\nRegistry', fontsize=8, ha='center', va='center', color='white', fontweight='bold')
+    ecr = Rectangle((12.5, 7.8), 1.8, 0.6, 
+                    facecolor=COLORS['aws_orange'], 
+                    edgecolor='black', 
+                    antialiased=False)
+    patches_list.append(ecr)
+    ax.text(13.4, 8.1, 'ECR\nContainer\nRegistry', fontproperties=FP_BOLD_8, ha='center', va='center', color='white')
     
     # NAT Gateways
-    nat1 = FancyBboxPatch((4.5, 7.8), 1, 0.4, 
-                          boxstyle="round,pad=0.02", 
-                          facecolor='orange', 
-                          edgecolor='black')
-    ax.add_patch(nat1)
-    ax.text(5, 8, 'NAT\nGW', fontsize=7, ha='center', va='center', fontweight='bold')
-    
-    nat2 = FancyBboxPatch((11.5, 7.8), 1, 0.4, 
-                          boxstyle="round,pad=0.02", 
-                          facecolor='orange', 
-                          edgecolor='black')
-    ax.add_patch(nat2)
-    ax.text(12, 8, 'NAT\nGW', fontsize=7, ha='center', va='center', fontweight='bold')
+    nat_centers = np.array([[5, 8], [12, 8]])
+    ax.add_collection(box_group(nat_centers, 1, 0.4, 'orange'))
+    for x, y in nat_centers:
+        ax.text(x, y, 'NAT\nGW', fontproperties=FP_BOLD_7, ha='center', va='center')
     
     # Route 53
-    route53 = FancyBboxPatch((1, 11), 2, 0.6, 
-                             boxstyle="round,pad=0.02", 
-                             facecolor=colors['aws_orange'], 
-                             edgecolor='black')
-    ax.add_patch(route53)
-    ax.text(2, 11.3, 'Route 53\nDNS', fontsize=8, ha='center', va='center', color='white', fontweight='bold')
+    route53 = Rectangle((1, 11), 2, 0.6, 
+                        facecolor=COLORS['aws_orange'], 
+                        edgecolor='black', 
+                        antialiased=False)
+    patches_list.append(route53)
+    ax.text(2, 11.3, 'Route 53\nDNS', fontproperties=FP_BOLD_8, ha='center', va='center', color='white')
     
     # Certificate Manager
-    acm = FancyBboxPatch((13, 11), 2, 0.6, 
-                         boxstyle="round,pad=0.02", 
-                         facecolor=colors['aws_orange'], 
-                         edgecolor='black')
-    ax.add_patch(acm)
-    ax.text(14, 11.3, 'ACM\nSSL/TLS', fontsize=8, ha='center', va='center', color='white', fontweight='bold')
+    acm = Rectangle((13, 11), 2, 0.6, 
+                    facecolor=COLORS['aws_orange'], 
+                    edgecolor='black', 
+                    antialiased=False)
+    patches_list.append(acm)
+    ax.text(14, 11.3, 'ACM\nSSL/TLS', fontproperties=FP_BOLD_8, ha='center', va='center', color='white')
     
     # Users
-    users = FancyBboxPatch((7, 12.5), 2, 0.6, 
-                           boxstyle="round,pad=0.02", 
-                           facecolor='lightblue', 
-                           edgecolor='black')
-    ax.add_patch(users)
-    ax.text(8, 12.8, '👥 Users', fontsize=10, ha='center', va='center', fontweight='bold')
-    
-    # Connection arrows
-    # Users to Route 53
-    ax.annotate('', xy=(2.5, 11.3), xytext=(7, 12.6),
-                arrowprops=dict(arrowstyle='->', lw=2, color='blue'))
-    
-    # Route 53 to ALB
-    ax.annotate('', xy=(6.5, 8.9), xytext=(3, 11.2),
-                arrowprops=dict(arrowstyle='->', lw=2, color='blue'))
-    
-    # Internet Gateway to ALB
-    ax.annotate('', xy=(8, 9.3), xytext=(8, 10.5),
-                arrowprops=dict(arrowstyle='->', lw=2, color='orange'))
-    
-    # ALB to services
-    ax.annotate('', xy=(3.4, 6.4), xytext=(7.5, 8.5),
-                arrowprops=dict(arrowstyle='->', lw=1.5, color='purple'))
-    ax.annotate('', xy=(10.4, 6.4), xytext=(8.5, 8.5),
-                arrowprops=dict(arrowstyle='->', lw=1.5, color='purple'))
-    
-    # Services to databases
-    ax.annotate('', xy=(3.5, 4.4), xytext=(3.4, 5.8),
-                arrowprops=dict(arrowstyle='->', lw=1.5, color='red'))
-    ax.annotate('', xy=(10.5, 4.4), xytext=(10.4, 5.8),
-                arrowprops=dict(arrowstyle='->', lw=1.5, color='purple'))
-    ax.annotate('', xy=(4, 4.1), xytext=(6.4, 5.8),
-                arrowprops=dict(arrowstyle='->', lw=1.5, color='red'))
-    ax.annotate('', xy=(9.5, 4.1), xytext=(6.4, 5.8),
-                arrowprops=dict(arrowstyle='->', lw=1.5, color='purple'))
-    
-    # Services to CloudWatch
-    ax.annotate('', xy=(12.5, 6.1), xytext=(7.3, 6.1),
-                arrowprops=dict(arrowstyle='->', lw=1, color='green'))
-    
-    # Legend
-    legend_y = 2.5
-    ax.text(1.5, legend_y, 'Legend:', fontsize=12, fontweight='bold')
-    
-    # Legend items
-    legend_items = [
-        ('Public Subnet', colors['public_green']),
-        ('Private App Subnet', colors['private_orange']),
-        ('Private DB Subnet', colors['database_purple']),
-        ('ECS Services', colors['container_teal']),
-        ('Cache/Database', colors['cache_red']),
-        ('AWS Services', colors['aws_orange'])
+    users = Rectangle((7, 12.5), 2, 0.6, 
+                      facecolor='lightblue', 
+                      edgecolor='black', 
+                      antialiased=False)
+    patches_list.append(users)
+    ax.text(8, 12.8, '👥 Users', fontproperties=FP_BOLD_10, ha='center', va='center')
+    
+    ax.add_collection(PatchCollection(patches_list, match_original=True))
+    
+    # Connection arrows as (start, end, color, linewidth)
+    arrows = [
+        # Users to Route 53
+        ((7, 12.6), (2.5, 11.3), 'blue', 2),
+        # Route 53 to ALB
+        ((3, 11.2), (6.5, 8.9), 'blue', 2),
+        # Internet Gateway to ALB
+        ((8, 10.5), (8, 9.3), 'orange', 2),
+        # ALB to services
+        ((7.5, 8.5), (3.4, 6.4), 'purple', 1.5),
+        ((8.5, 8.5), (10.4, 6.4), 'purple', 1.5),
+        # Services to databases
+        ((3.4, 5.8), (3.5, 4.4), 'red', 1.5),
+        ((10.4, 5.8), (10.5, 4.4), 'purple', 1.5),
+        ((6.4, 5.8), (4, 4.1), 'red', 1.5),
+        ((6.4, 5.8), (9.5, 4.1), 'purple', 1.5),
+        # Services to CloudWatch
+        ((7.3, 6.1), (12.5, 6.1), 'green', 1),
     ]
-    
-    for i, (label, color) in enumerate(legend_items):
-        y_pos = legend_y - 0.3 - (i * 0.25)
-        legend_box = FancyBboxPatch((1.5, y_pos-0.05), 0.3, 0.15, 
-                                    boxstyle="round,pad=0.02", 
-                                    facecolor=color, 
-                                    alpha=0.7)
-        ax.add_patch(legend_box)
-        ax.text(2, y_pos, label, fontsize=9, va='center')
-    
-    plt.tight_layout()
+    draw_arrows(ax,
+                [a[0] for a in arrows],
+                [a[1] for a in arrows],
+                [a[2] for a in arrows],
+                [a[3] for a in arrows])
+
+def create_aws_architecture_diagram(labels=None, fig=None):
+    fig, ax = _architecture_axes(fig)
+    _draw_static(ax, {**ARCH_LABELS, **(labels or {})})
+    _draw_dynamic(ax)
     return fig
 
-def create_data_flow_diagram():
+def preview_aws_architecture_diagram():
+    """Build the architecture diagram for interactive use.
+    
+    The static layout is rendered once and cached; the returned redraw()
+    callback restores that background and blits only the dynamic overlay.
+    Needs an interactive backend, so import this module rather than running it.
+    The overlay is not marked animated, so a full draw or savefig still includes it.
+    """
+    fig, ax = _architecture_axes()
+    _draw_static(ax)
+    fig.canvas.draw()
+    background = fig.canvas.copy_from_bbox(fig.bbox)
+    
+    n_texts, n_collections = len(ax.texts), len(ax.collections)
+    _draw_dynamic(ax)
+    overlay = list(ax.texts[n_texts:]) + list(ax.collections[n_collections:])
+    
+    def redraw():
+        fig.canvas.restore_region(background)
+        for artist in overlay:
+            ax.draw_artist(artist)
+        fig.canvas.blit(fig.bbox)
+    
+    redraw()
+    return fig, redraw
+
+
+def create_data_flow_diagram(fig=None):
     """Create a separate data flow diagram"""
-    fig, ax = plt.subplots(1, 1, figsize=(14, 10))
+    fig = _prepare_figure(fig, (14, 10))
+    ax = fig.add_subplot(111)
+    fig.subplots_adjust(left=0, right=1, top=1, bottom=0)
     ax.set_xlim(0, 14)
     ax.set_ylim(0, 10)
     ax.axis('off')
     
     # Title
     ax.text(7, 9.5, 'Modern Voting App - Data Flow Architecture', 
-            fontsize=18, fontweight='bold', ha='center')
+            fontproperties=FP_BOLD_18, ha='center')
     
     # Components
     components = [
@@ -308,43 +445,44 @@ def create_data_flow_diagram():
         {'name': 'CloudWatch\n(Monitoring)', 'pos': (7, 2), 'color': '#B8E986'}
     ]
     
-    # Draw components
-    for comp in components:
-        box = FancyBboxPatch((comp['pos'][0]-0.8, comp['pos'][1]-0.4), 1.6, 0.8,
-                             boxstyle="round,pad=0.1",
-                             facecolor=comp['color'],
-                             edgecolor='black',
-                             linewidth=2)
-        ax.add_patch(box)
-        ax.text(comp['pos'][0], comp['pos'][1], comp['name'],
-                ha='center', va='center', fontsize=10, fontweight='bold',
+    # Draw components: box corners are computed for all components at once
+    pos = np.array([comp['pos'] for comp in components], dtype=float)
+    corners = pos - [0.8, 0.4]
+    boxes = [FancyBboxPatch(corner, 1.6, 0.8,
+                            boxstyle=_BOX10,
+                            facecolor=comp['color'],
+                            edgecolor='black',
+                            linewidth=2, 
+                            antialiased=False)
+             for corner, comp in zip(corners, components)]
+    ax.add_collection(PatchCollection(boxes, match_original=True))
+    
+    for (x, y), comp in zip(pos, components):
+        ax.text(x, y, comp['name'],
+                ha='center', va='center', fontproperties=FP_BOLD_10,
                 color='white' if comp['color'] in ['#BD10E0', '#D0021B', '#9013FE'] else 'black')
     
-    # Data flow arrows with labels
-    flows = [
-        {'from': (2, 8), 'to': (7, 8), 'label': '1. HTTP Request', 'color': 'blue'},
-        {'from': (7, 8), 'to': (4, 6), 'label': '2. Route to Vote App', 'color': 'green'},
-        {'from': (7, 8), 'to': (10, 6), 'label': '2. Route to Result App', 'color': 'green'},
-        {'from': (4, 6), 'to': (4, 4), 'label': '3. Queue Vote', 'color': 'red'},
-        {'from': (4, 4), 'to': (7, 4), 'label': '4. Process Vote', 'color': 'orange'},
-        {'from': (7, 4), 'to': (10, 4), 'label': '5. Store Vote', 'color': 'purple'},
-        {'from': (10, 6), 'to': (10, 4), 'label': '6. Read Results', 'color': 'purple'},
-        {'from': (10, 6), 'to': (2, 8), 'label': '7. Real-time Updates', 'color': 'blue'},
-        {'from': (7, 4), 'to': (7, 2), 'label': 'Logs & Metrics', 'color': 'gray'},
-        {'from': (4, 6), 'to': (7, 2), 'label': 'Logs & Metrics', 'color': 'gray'},
-        {'from': (10, 6), 'to': (7, 2), 'label': 'Logs & Metrics', 'color': 'gray'}
-    ]
-    
-    for flow in flows:
-        ax.annotate('', xy=flow['to'], xytext=flow['from'],
-                    arrowprops=dict(arrowstyle='->', lw=2, color=flow['color']))
-        
-        # Add label
-        mid_x = (flow['from'][0] + flow['to'][0]) / 2
-        mid_y = (flow['from'][1] + flow['to'][1]) / 2
-        ax.text(mid_x, mid_y + 0.2, flow['label'], 
-                ha='center', va='bottom', fontsize=8, 
-                bbox=dict(boxstyle="round,pad=0.2", facecolor='white', alpha=0.8))
+    # Data flow arrows: endpoints as one (fx, fy, tx, ty) array, with labels and colors alongside
+    flows = np.array([
+        [2, 8, 7, 8], [7, 8, 4, 6], [7, 8, 10, 6], [4, 6, 4, 4], [4, 4, 7, 4], [7, 4, 10, 4],
+        [10, 6, 10, 4], [10, 6, 2, 8], [7, 4, 7, 2], [4, 6, 7, 2], [10, 6, 7, 2],
+    ], dtype=float)
+    flow_labels = ['1. HTTP Request', '2. Route to Vote App', '2. Route to Result App',
+                   '3. Queue Vote', '4. Process Vote', '5. Store Vote', '6. Read Results',
+                   '7. Real-time Updates', 'Logs & Metrics', 'Logs & Metrics', 'Logs & Metrics']
+    flow_colors = ['blue', 'green', 'green', 'red', 'orange', 'purple', 'purple', 'blue',
+                   'gray', 'gray', 'gray']
+    
+    starts, ends = flows[:, :2], flows[:, 2:]
+    draw_arrows(ax, starts, ends, flow_colors, 2)
+    
+    # Labels sit just above the midpoint of each arrow
+    mids = 0.5 * (starts + ends)
+    mids[:, 1] += 0.2
+    for (mid_x, mid_y), label in zip(mids, flow_labels):
+        ax.text(mid_x, mid_y, label, 
+                ha='center', va='bottom', fontproperties=FP_8, 
+                bbox=dict(boxstyle=_BOX20, facecolor='white', alpha=0.8))
     
     # Add process description
     process_text = """
@@ -359,28 +497,235 @@ Data Flow Process:
 8. All components send logs and metrics to CloudWatch
     """
     
-    ax.text(0.5, 1.5, process_text, fontsize=10, va='top',
-            bbox=dict(boxstyle="round,pad=0.3", facecolor='#F0F8FF', alpha=0.8))
+    ax.text(0.5, 1.5, process_text, fontproperties=FP_10, va='top',
+            bbox=dict(boxstyle=_BOX30, facecolor=blend('#F0F8FF', 0.8, 'white')))
     
-    plt.tight_layout()
     return fig
 
-if __name__ == "__main__":
-    # Create architecture diagram
-    print("🏗️  Generating AWS Architecture Diagram...")
-    arch_fig = create_aws_architecture_diagram()
-    arch_fig.savefig('/mnt/c/Users/IsaacTandoh/Downloads/isaac_tandoh/example-voting-app-docker/aws-architecture.png', 
-                     dpi=300, bbox_inches='tight', facecolor='white')
-    print("✅ Architecture diagram saved as 'aws-architecture.png'")
-    
-    # Create data flow diagram
-    print("🔄 Generating Data Flow Diagram...")
-    flow_fig = create_data_flow_diagram()
-    flow_fig.savefig('/mnt/c/Users/IsaacTandoh/Downloads/isaac_tandoh/example-voting-app-docker/data-flow-diagram.png', 
-                     dpi=300, bbox_inches='tight', facecolor='white')
-    print("✅ Data flow diagram saved as 'data-flow-diagram.png'")
+def is_up_to_date(out_path):
+    """Return True if out_path exists and is newer than this script"""
+    return (os.path.exists(out_path)
+            and os.path.getmtime(out_path) >= os.path.getmtime(__file__))
+
+def build_svg_template(template_path=TEMPLATE_PATH):
+    """Render the architecture once to an SVG with $placeholders in place of the labels"""
+    placeholders = {key: '${%s}' % key for key in ARCH_LABELS}
+    # Keep text as <text> elements so the placeholders survive as plain strings
+    with plt.rc_context({'svg.fonttype': 'none'}):
+        fig = create_aws_architecture_diagram(placeholders)
+        # The template may be scaled to any dpi later, so keep the background layer vector
+        for artist in fig.findobj(lambda a: a.get_rasterized()):
+            artist.set_rasterized(False)
+        fig.savefig(template_path, format='svg', bbox_inches='tight', facecolor='white')
+    plt.close(fig)
+
+def render_from_template(out_path, labels=None, dpi=150, template_path=TEMPLATE_PATH):
+    """Write the architecture diagram by filling in the SVG template, bypassing matplotlib.
+    
+    Returns False if out_path's format cannot be produced from the template.
+    """
+    to_png = out_path.endswith('.png')
+    if not (out_path.endswith('.svg') or (to_png and cairosvg is not None)):
+        return False
+    
+    if not is_up_to_date(template_path):
+        build_svg_template(template_path)
+    values = {key: escape(value) for key, value in {**ARCH_LABELS, **(labels or {})}.items()}
+    svg = Template(Path(template_path).read_text(encoding='utf-8')).safe_substitute(values)
+    
+    if to_png:
+        cairosvg.svg2png(bytestring=svg.encode('utf-8'), write_to=out_path, dpi=dpi)
+    else:
+        Path(out_path).write_text(svg, encoding='utf-8')
+    return True
+
+def create_aws_architecture_graph(labels=None):
+    """Describe the architecture as a graphviz Digraph, laid out and rendered by dot"""
+    labels = {**ARCH_LABELS, **(labels or {})}
+    white = {'fontcolor': 'white'}
+    g = graphviz.Digraph(ARCH_NAME, graph_attr={'label': labels['title'], 'labelloc': 't',
+                                                'fontsize': '20', 'newrank': 'true'},
+                         node_attr={'shape': 'box', 'style': 'filled', 'fontsize': '9'})
+    
+    g.node('users', '👥 Users', fillcolor='lightblue')
+    g.node('route53', 'Route 53\\nDNS', fillcolor=COLORS['aws_orange'], **white)
+    g.node('acm', 'ACM\\nSSL/TLS', fillcolor=COLORS['aws_orange'], **white)
+    
+    with g.subgraph(name='cluster_cloud') as cloud:
+        cloud.attr(label='AWS Cloud', color=COLORS['aws_orange'], style='rounded,filled',
+                   fillcolor='#F0F8FF', penwidth='3')
+        cloud.node('igw', 'Internet\\nGateway', fillcolor=COLORS['aws_orange'], **white)
+        cloud.node('ecr', 'ECR\\nContainer\\nRegistry', fillcolor=COLORS['aws_orange'], **white)
+        cloud.node('cloudwatch', 'CloudWatch\\nLogs/Metrics', fillcolor=COLORS['monitoring'])
+        
+        with cloud.subgraph(name='cluster_vpc') as vpc:
+            vpc.attr(label=labels['vpc'], color=COLORS['vpc_blue'], fillcolor='#E8F4FD', penwidth='2')
+            vpc.node('alb', 'Application Load Balancer', fillcolor=COLORS['load_balancer'], **white)
+            
+            # Nodes per subnet tier (public, app, db) for each Availability Zone
+            zones = [
+                ('A', [('nat_a', 'NAT\\nGW', 'orange', {})],
+                      [('vote', 'Vote App\\n(ECS)', COLORS['container_teal'], {}),
+                       ('worker', 'Worker\\n(ECS)', COLORS['container_teal'], {})],
+                      [('redis', 'ElastiCache\\nRedis', COLORS['cache_red'], white)]),
+                ('B', [('nat_b', 'NAT\\nGW', 'orange', {})],
+                      [('result', 'Result App\\n(ECS)', COLORS['container_teal'], {})],
+                      [('postgres', 'RDS\\nPostgreSQL', COLORS['database_purple'], white)]),
+            ]
+            tiers = [('Public Subnet {}', 'public_green'),
+                     ('Private Subnet {} (App)', 'private_orange'),
+                     ('Private Subnet {} (DB)', 'database_purple')]
+            for zone_index, (zone, *zone_nodes) in enumerate(zones):
+                with vpc.subgraph(name=f'cluster_az_{zone.lower()}') as az:
+                    az.attr(label=f'Availability Zone {zone}', color='gray', style='dashed,filled',
+                            fillcolor=COLORS['az_fill'])
+                    for tier_index, ((title, color), nodes) in enumerate(zip(tiers, zone_nodes)):
+                        cidr = f'10.0.{tier_index * 2 + zone_index + 1}.0/24'
+                        with az.subgraph(name=f'cluster_{color}_{zone.lower()}') as subnet:
+                            subnet.attr(label=f'{title.format(zone)}\\n{cidr}', style='filled',
+                                        color=SUBNET_EDGE_HEX, fillcolor=blend_hex(COLORS[color], 0.3))
+                            for node_id, text, fill, extra in nodes:
+                                subnet.node(node_id, text, fillcolor=fill, **extra)
+    
+    # Keep each tier on one row across both Availability Zones
+    for row in (['nat_a', 'nat_b'], ['vote', 'worker', 'result'], ['redis', 'postgres']):
+        with g.subgraph() as same:
+            same.attr(rank='same')
+            for node_id in row:
+                same.node(node_id)
+    
+    edges = [
+        ('users', 'route53', 'blue', 2), ('route53', 'alb', 'blue', 2), ('igw', 'alb', 'orange', 2),
+        ('alb', 'vote', 'purple', 1.5), ('alb', 'result', 'purple', 1.5),
+        ('vote', 'redis', 'red', 1.5), ('result', 'postgres', 'purple', 1.5),
+        ('worker', 'redis', 'red', 1.5), ('worker', 'postgres', 'purple', 1.5),
+        ('worker', 'cloudwatch', 'green', 1),
+    ]
+    for tail, head, color, width in edges:
+        g.edge(tail, head, color=color, penwidth=str(width))
+    return g
+
+def render_graph(out_path, fmt, dpi, labels=None):
+    """Render the architecture with graphviz's dot instead of matplotlib"""
+    g = create_aws_architecture_graph(labels)
+    g.attr(dpi=str(dpi))
+    Path(out_path).write_bytes(g.pipe(format=fmt))
+
+DIAGRAMS = {
+    ARCH_NAME: create_aws_architecture_diagram,
+    FLOW_NAME: create_data_flow_diagram,
+}
+
+def render_diagram(name, out_path, dpi, fig=None, labels=None):
+    """Build one diagram and save it to out_path.
+    
+    Pass fig to draw into an existing figure (it is cleared first) rather than
+    creating and closing a new one. labels only apply to the architecture diagram.
+    """
+    own_fig = fig is None
+    fig = DIAGRAMS[name](fig=fig, **({'labels': labels} if name == ARCH_NAME else {}))
+    fig.savefig(out_path, dpi=dpi, bbox_inches='tight', facecolor='white')
+    if own_fig:
+        plt.close(fig)
+    return out_path
+
+def label_override(text):
+    """Parse a --label KEY=VALUE argument into a (key, value) pair"""
+    key, sep, value = text.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got '{text}'")
+    if key not in ARCH_LABELS:
+        raise argparse.ArgumentTypeError(f"unknown label '{key}' (choose from {', '.join(ARCH_LABELS)})")
+    return key, value
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the voting app architecture diagrams")
+    parser.add_argument('--dpi', type=int, default=150,
+                        help="resolution for raster output (default: 150)")
+    parser.add_argument('--format', default='png', choices=['png', 'svg', 'pdf'],
+                        help="output format; svg/pdf skip rasterization entirely (default: png)")
+    parser.add_argument('--force', action='store_true',
+                        help="regenerate even if the output is newer than this script")
+    parser.add_argument('--backend', default='matplotlib', choices=['matplotlib', 'graphviz'],
+                        help="renderer for the architecture diagram; graphviz needs the graphviz "
+                             "package and the dot binary (default: matplotlib)")
+    parser.add_argument('--from-template', action='store_true',
+                        help="fill in the cached SVG template instead of redrawing the architecture "
+                             "(png output needs cairosvg)")
+    parser.add_argument('--label', action='append', default=[], type=label_override, metavar='KEY=VALUE',
+                        help=f"override a label in the architecture diagram ({', '.join(ARCH_LABELS)})")
+    parser.add_argument('--jobs', type=int, default=2,
+                        help="number of diagrams to render in parallel processes (default: 2)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    arch_file = f"{ARCH_NAME}.{args.format}"
+    flow_file = f"{FLOW_NAME}.{args.format}"
+    targets = [
+        (ARCH_NAME, arch_file, "🏗️  Generating AWS Architecture Diagram...", "Architecture diagram"),
+        (FLOW_NAME, flow_file, "🔄 Generating Data Flow Diagram...", "Data flow diagram"),
+    ]
+    
+    # The mtime check can't see label overrides or a change of renderer, so the
+    # architecture diagram is always redrawn when either is requested
+    arch_stale = bool(args.label) or args.backend != 'matplotlib'
+    pending = []
+    for name, out_file, banner, label in targets:
+        print(banner)
+        out_path = os.path.join(OUTPUT_DIR, out_file)
+        if not (args.force or (arch_stale and name == ARCH_NAME)) and is_up_to_date(out_path):
+            print(f"⏭️  '{out_file}' is up to date, skipping")
+        else:
+            pending.append((name, out_path, out_file, label))
+    
+    labels = dict(args.label)
+    if args.backend == 'graphviz':
+        if graphviz is None:
+            print("⚠️  The graphviz package is not installed, rendering with matplotlib")
+        else:
+            for job in list(pending):
+                name, out_path, out_file, label = job
+                if name == ARCH_NAME:
+                    try:
+                        render_graph(out_path, args.format, args.dpi, labels)
+                    except graphviz.ExecutableNotFound:
+                        print("⚠️  The graphviz dot binary was not found, rendering with matplotlib")
+                        continue
+                    pending.remove(job)
+                    print(f"✅ {label} saved as '{out_file}' (graphviz)")
+    
+    if args.from_template:
+        for job in list(pending):
+            name, out_path, out_file, label = job
+            if name != ARCH_NAME:
+                continue
+            if render_from_template(out_path, labels, args.dpi):
+                pending.remove(job)
+                print(f"✅ {label} saved as '{out_file}' (from template)")
+            else:
+                print(f"⚠️  Cannot fill the template as {args.format} (is cairosvg installed?), rendering with matplotlib")
+    
+    if args.jobs > 1 and len(pending) > 1:
+        # The diagrams share no state, so each one renders on its own core
+        with ProcessPoolExecutor(max_workers=min(args.jobs, len(pending))) as executor:
+            futures = [(executor.submit(render_diagram, name, out_path, args.dpi, labels=labels), out_file, label)
+                       for name, out_path, out_file, label in pending]
+            for future, out_file, label in futures:
+                future.result()
+                print(f"✅ {label} saved as '{out_file}'")
+    elif pending:
+        # In-process rendering draws every diagram into the same, cleared figure
+        fig = plt.figure()
+        for name, out_path, out_file, label in pending:
+            render_diagram(name, out_path, args.dpi, fig, labels)
+            print(f"✅ {label} saved as '{out_file}'")
+        plt.close(fig)
     
     print("\n🎉 Architecture diagrams generated successfully!")
     print("📁 Files created:")
-    print("   - aws-architecture.png (AWS infrastructure layout)")
-    print("   - data-flow-diagram.png (Application data flow)")
+    print(f"   - {arch_file} (AWS infrastructure layout)")
+    print(f"   - {flow_file} (Application data flow)")
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,37 @@
-from flask import Flask, render_template, request, make_response, g, jsonify, send_from_directory, render_template_string
+from flask import Flask, Response, render_template, request, make_response, send_from_directory
 from redis import Redis
 import os
 import socket
-import random
+from secrets import token_hex
 import json
 import logging
-from datetime import datetime
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import psycopg2
+    import psycopg2.pool
+except ImportError:  # optional: without it, stats come from the Redis counters only
+    psycopg2 = None
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib json module
+    orjson = None
+
+if orjson is not None:
+    json_dumps = orjson.dumps  # bytes, which Redis takes as-is
+    json_loads = orjson.loads  # accepts bytes, no decode needed
+else:
+    def json_dumps(obj):
+        return json.dumps(obj).encode('utf-8')
+    json_loads = json.loads
+
+def json_response(obj):
+    """JSON response serialized with json_dumps, skipping Flask's JSON provider"""
+    return Response(json_dumps(obj), mimetype='application/json')
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,105 +42,203 @@ option_a = os.getenv('OPTION_A', "Cats")
 option_b = os.getenv('OPTION_B', "Dogs")
 hostname = socket.gethostname()
 
+VOTER_COOKIE_MAX_AGE = 30 * 24 * 60 * 60  # 30 days
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
 
+# (epoch second, formatted UTC time) for iso_now(); replaced as a whole so readers
+# never see a second paired with another second's string
+_ISO_NOW = (None, '')
+
+def iso_now():
+    """Current UTC time as ISO 8601 to the second, formatted at most once per second"""
+    global _ISO_NOW
+    now = int(time.time())
+    cached = _ISO_NOW
+    if cached[0] != now:
+        cached = _ISO_NOW = (now, time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(now)))
+    return cached[1]
+
+# Content Security Policy, kept as one string so every response shares the same object
+_CSP = "default-src 'self'; script-src 'self' 'unsafe-inline' https://code.jquery.com https://cdn.jsdelivr.net; style-src 'self' 'unsafe-inline' https://fonts.googleapis.com https://cdnjs.cloudflare.com; font-src 'self' https://fonts.gstatic.com https://cdnjs.cloudflare.com; img-src 'self' data:; media-src 'self'; connect-src 'self';"
+
+# Security headers added to every response
+_SEC_HEADERS = {
+    'X-Content-Type-Options': 'nosniff',
+    'X-Frame-Options': 'DENY',
+    'X-XSS-Protection': '1; mode=block',
+    'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
+    'Content-Security-Policy': _CSP,
+}
+
 # Security headers middleware
 @app.after_request
 def add_security_headers(response):
     """Add security headers to all responses"""
-    response.headers['X-Content-Type-Options'] = 'nosniff'
-    response.headers['X-Frame-Options'] = 'DENY'
-    response.headers['X-XSS-Protection'] = '1; mode=block'
-    response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
-    response.headers['Content-Security-Policy'] = (
-        "default-src 'self'; "
-        "script-src 'self' 'unsafe-inline' https://code.jquery.com https://cdn.jsdelivr.net; "
-        "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com https://cdnjs.cloudflare.com; "
-        "font-src 'self' https://fonts.gstatic.com https://cdnjs.cloudflare.com; "
-        "img-src 'self' data:; "
-        "media-src 'self'; "
-        "connect-src 'self';"
-    )
+    response.headers.update(_SEC_HEADERS)
     return response
 
+# One Redis client for the whole process; redis-py is thread-safe and pools its connections.
+# Reachability is re-checked at most every REDIS_CHECK_INTERVAL seconds rather than per request.
+_REDIS = Redis(host="redis", db=0, socket_timeout=5, socket_connect_timeout=5, health_check_interval=30)
+REDIS_CHECK_INTERVAL = 5.0
+_REDIS_CHECK = {'ts': float('-inf'), 'ok': False}
+
 def get_redis():
-    """Get Redis connection with error handling"""
-    if not hasattr(g, 'redis'):
+    """Get the shared Redis client, or None if it was unreachable at the last check"""
+    now = time.monotonic()
+    if now - _REDIS_CHECK['ts'] >= REDIS_CHECK_INTERVAL:
         try:
-            g.redis = Redis(host="redis", db=0, socket_timeout=5, socket_connect_timeout=5)
-            # Test connection
-            g.redis.ping()
+            _REDIS.ping()
+            _REDIS_CHECK['ok'] = True
         except Exception as e:
             logger.error(f"Redis connection failed: {e}")
-            g.redis = None
-    return g.redis
+            _REDIS_CHECK['ok'] = False
+        _REDIS_CHECK['ts'] = now
+    return _REDIS if _REDIS_CHECK['ok'] else None
+
+# PostgreSQL connection settings, read from the environment once
+_PG_KW = dict(
+    host=os.environ.get('POSTGRES_HOST', 'db'),
+    database=os.environ.get('POSTGRES_DB', 'postgres'),
+    user=os.environ.get('POSTGRES_USER', 'postgres'),
+    password=os.environ.get('POSTGRES_PASSWORD', 'postgres'),
+    connect_timeout=5
+)
+
+# PostgreSQL connections are pooled and reused across requests. The pool is created on
+# first use so the app still starts (and falls back to Redis) while the database is down.
+# Stats queries are serialized by _STATS_LOCK, so one connection per worker is enough.
+_PG_POOL = None
+_PG_POOL_LOCK = threading.Lock()
+
+def get_pg_pool():
+    """Get the shared PostgreSQL connection pool, creating it on first use"""
+    global _PG_POOL
+    if _PG_POOL is None:
+        with _PG_POOL_LOCK:
+            if _PG_POOL is None:
+                _PG_POOL = psycopg2.pool.ThreadedConnectionPool(minconn=1, maxconn=1, **_PG_KW)
+    return _PG_POOL
+
+@contextmanager
+def pg_connection():
+    """Borrow a pooled PostgreSQL connection for the duration of a with block"""
+    pg_pool = get_pg_pool()
+    conn = pg_pool.getconn()
+    try:
+        with conn:  # commits, or rolls back on error, when the block ends
+            yield conn
+    finally:
+        pg_pool.putconn(conn)  # a closed connection is dropped rather than reused
+
+def prewarm_connections():
+    """Open the Redis and PostgreSQL connections up front so the first request doesn't pay for them"""
+    if get_redis() is None:
+        # Don't let a boot-time failure stand for REDIS_CHECK_INTERVAL; the first request re-checks
+        _REDIS_CHECK['ts'] = float('-inf')
+    if psycopg2 is not None:
+        try:
+            with pg_connection():
+                pass
+        except Exception as e:
+            logger.warning(f"Could not prewarm database pool: {e}")
+
+# Runs once per gunicorn worker, since each worker imports the app after forking
+prewarm_connections()
+
+# Vote stats are shared by all requests for STATS_TTL seconds, so bursts of
+# clients cost one aggregation instead of one each
+STATS_TTL = 1.0
+_STATS_CACHE = {'ts': 0, 'val': None}
+_STATS_LOCK = threading.Lock()
 
 def get_vote_stats():
+    """Get current vote statistics, cached for STATS_TTL seconds"""
+    if time.monotonic() - _STATS_CACHE['ts'] < STATS_TTL:
+        return _STATS_CACHE['val']
+    with _STATS_LOCK:
+        # Another thread may have refreshed the cache while we waited
+        if time.monotonic() - _STATS_CACHE['ts'] >= STATS_TTL:
+            _STATS_CACHE['val'] = _query_vote_stats()
+            _STATS_CACHE['ts'] = time.monotonic()
+        return _STATS_CACHE['val']
+
+# After DB_FAILURE_THRESHOLD consecutive database errors, stats skip the database and go
+# straight to Redis for DB_COOLDOWN seconds instead of waiting on a dead server each time
+DB_FAILURE_THRESHOLD = 3
+DB_COOLDOWN = 10.0
+_DB_CIRCUIT = {'open_until': 0, 'fails': 0}
+
+def _query_vote_stats():
     """Get current vote statistics from database"""
-    try:
-        # Try to get stats from database first (more accurate)
-        import psycopg2
-        conn = psycopg2.connect(
-            host=os.environ.get('POSTGRES_HOST', 'db'),
-            database=os.environ.get('POSTGRES_DB', 'postgres'),
-            user=os.environ.get('POSTGRES_USER', 'postgres'),
-            password=os.environ.get('POSTGRES_PASSWORD', 'postgres')
-        )
-        cursor = conn.cursor()
-        cursor.execute("SELECT vote, COUNT(*) FROM votes GROUP BY vote")
-        results = cursor.fetchall()
-        
-        vote_counts = {'a': 0, 'b': 0}
-        for vote, count in results:
-            if vote in ['a', 'b']:
-                vote_counts[vote] = count
-        
-        cursor.close()
-        conn.close()
-        
-        total = vote_counts['a'] + vote_counts['b']
-        return {
-            'a': vote_counts['a'],
-            'b': vote_counts['b'],
-            'total': total
-        }
-    except Exception as e:
-        logger.warning(f"Could not get stats from database: {e}")
-        # Fallback to Redis (original logic)
-        redis = get_redis()
-        if not redis:
-            return {'a': 0, 'b': 0, 'total': 0}
-        
+    if psycopg2 is not None and time.monotonic() >= _DB_CIRCUIT['open_until']:
         try:
-            # Get all votes from Redis
-            votes = redis.lrange('votes', 0, -1)
-            vote_counts = {'a': 0, 'b': 0}
+            # Try to get stats from database first (more accurate)
+            with pg_connection() as conn, conn.cursor() as cursor:
+                # Both counts come back as a single row
+                cursor.execute("SELECT COUNT(*) FILTER (WHERE vote = 'a'), "
+                               "COUNT(*) FILTER (WHERE vote = 'b') FROM votes")
+                a, b = cursor.fetchone()
             
-            for vote_data in votes:
-                try:
-                    vote = json.loads(vote_data.decode('utf-8'))
-                    if vote.get('vote') in ['a', 'b']:
-                        vote_counts[vote['vote']] += 1
-                except (json.JSONDecodeError, UnicodeDecodeError):
-                    continue
-            
-            total = vote_counts['a'] + vote_counts['b']
+            _DB_CIRCUIT['fails'] = 0
             return {
-                'a': vote_counts['a'],
-                'b': vote_counts['b'],
-                'total': total
+                'a': a,
+                'b': b,
+                'total': a + b
             }
-        except Exception as redis_error:
-            logger.error(f"Error getting vote stats: {redis_error}")
-            return {'a': 0, 'b': 0, 'total': 0}
+        except Exception as e:
+            logger.warning(f"Could not get stats from database: {e}")
+            _DB_CIRCUIT['fails'] += 1
+            if _DB_CIRCUIT['fails'] >= DB_FAILURE_THRESHOLD:
+                _DB_CIRCUIT['open_until'] = time.monotonic() + DB_COOLDOWN
+                logger.warning(f"Using Redis for stats for the next {DB_COOLDOWN:.0f}s")
+    
+    # Fallback to the Redis vote counters
+    redis = get_redis()
+    if not redis:
+        return {'a': 0, 'b': 0, 'total': 0}
+    
+    try:
+        counts = redis.mget('votes:a', 'votes:b')
+        if None in counts:
+            counts = _backfill_vote_counters(redis)
+        a, b = int(counts[0]), int(counts[1])
+        return {
+            'a': a,
+            'b': b,
+            'total': a + b
+        }
+    except Exception as redis_error:
+        logger.error(f"Error getting vote stats: {redis_error}")
+        return {'a': 0, 'b': 0, 'total': 0}
+
+def _backfill_vote_counters(redis):
+    """Seed missing votes:a / votes:b counters from the votes still queued in Redis"""
+    vote_counts = {'a': 0, 'b': 0}
+    for vote_data in redis.lrange('votes', 0, -1):
+        try:
+            vote = json_loads(vote_data)
+            if vote.get('vote') in ['a', 'b']:
+                vote_counts[vote['vote']] += 1
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue
+    
+    # setnx leaves a counter alone if a vote created it in the meantime
+    pipe = redis.pipeline()
+    pipe.setnx('votes:a', vote_counts['a'])
+    pipe.setnx('votes:b', vote_counts['b'])
+    pipe.mget('votes:a', 'votes:b')
+    return pipe.execute()[-1]
 
 @app.route("/", methods=['POST', 'GET'])
 def vote():
     """Main voting route with modern UI"""
     voter_id = request.cookies.get('voter_id')
-    if not voter_id:
-        voter_id = hex(random.getrandbits(64))[2:-1]
+    new_voter = not voter_id
+    if new_voter:
+        voter_id = token_hex(8)
 
     vote = None
     error_message = None
@@ -126,12 +250,17 @@ def vote():
                 vote_option = request.form.get('vote')
                 if vote_option in ['a', 'b']:
                     vote = vote_option
-                    data = json.dumps({
+                    data = json_dumps({
                         'voter_id': voter_id, 
                         'vote': vote,
-                        'timestamp': datetime.utcnow().isoformat()
+                        'timestamp': datetime.now(timezone.utc).isoformat(timespec='milliseconds')
                     })
-                    redis.rpush('votes', data)
+                    # Queue the vote for the worker and count it, in one round trip; the two
+                    # commands don't need to be atomic, so skip the MULTI/EXEC wrapper
+                    pipe = redis.pipeline(transaction=False)
+                    pipe.rpush('votes', data)
+                    pipe.incr(f'votes:{vote}')
+                    pipe.execute()
                     logger.info(f"Vote recorded: {vote} from {voter_id}")
                 else:
                     error_message = "Invalid vote option"
@@ -141,10 +270,14 @@ def vote():
         else:
             error_message = "Service temporarily unavailable. Please try again."
 
-    # Check if request wants JSON response (for AJAX)
-    if request.headers.get('Content-Type') == 'application/json' or request.args.get('format') == 'json':
-        stats = get_vote_stats()
-        return jsonify({
+    # Check if request wants JSON response (for AJAX); the query string is the common case
+    if request.args.get('format') == 'json' or request.headers.get('Content-Type') == 'application/json':
+        # A vote is acknowledged without stats unless the caller asks for them with ?stats=1
+        if request.method == 'GET' or request.args.get('stats') == '1':
+            stats = get_vote_stats()
+        else:
+            stats = None
+        return json_response({
             'vote': vote,
             'error': error_message,
             'stats': stats,
@@ -159,15 +292,17 @@ def vote():
         vote=None,  # Don't pass vote back to template to prevent pre-selection
         error=error_message,
     ))
-    resp.set_cookie('voter_id', voter_id, max_age=30*24*60*60)  # 30 days
+    if new_voter:
+        resp.set_cookie('voter_id', voter_id, max_age=VOTER_COOKIE_MAX_AGE)
     return resp
 
 @app.route("/classic")
 def classic_vote():
     """Original voting interface for comparison"""
     voter_id = request.cookies.get('voter_id')
-    if not voter_id:
-        voter_id = hex(random.getrandbits(64))[2:-1]
+    new_voter = not voter_id
+    if new_voter:
+        voter_id = token_hex(8)
 
     resp = make_response(render_template(
         'index.html',
@@ -176,21 +311,22 @@ def classic_vote():
         hostname=hostname,
         vote=None,
     ))
-    resp.set_cookie('voter_id', voter_id, max_age=30*24*60*60)
+    if new_voter:
+        resp.set_cookie('voter_id', voter_id, max_age=VOTER_COOKIE_MAX_AGE)
     return resp
 
 @app.route("/api/stats")
 def api_stats():
     """API endpoint for vote statistics"""
     stats = get_vote_stats()
-    return jsonify({
+    return json_response({
         'votes': stats,
         'options': {
             'a': option_a,
             'b': option_b
         },
         'hostname': hostname,
-        'timestamp': datetime.utcnow().isoformat()
+        'timestamp': iso_now()
     })
 
 @app.route("/api/health")
@@ -199,47 +335,52 @@ def health_check():
     redis = get_redis()
     redis_status = "connected" if redis else "disconnected"
     
-    return jsonify({
+    return json_response({
         'status': 'healthy',
         'redis': redis_status,
         'hostname': hostname,
-        'timestamp': datetime.utcnow().isoformat()
+        'timestamp': iso_now()
     })
 
 @app.route("/sw.js")
 def service_worker():
     """Serve service worker"""
-    return send_from_directory('static', 'sw.js', mimetype='application/javascript')
+    resp = send_from_directory('static', 'sw.js', mimetype='application/javascript')
+    # Kept short so service worker updates still reach clients within the hour
+    resp.headers['Cache-Control'] = 'public, max-age=3600'
+    return resp
+
+# PWA manifest, serialized once
+_MANIFEST_BODY = json_dumps({
+    "name": "Modern Voting App",
+    "short_name": "VoteApp",
+    "description": "A modern voting application with real-time results",
+    "start_url": "/",
+    "display": "standalone",
+    "background_color": "#f9fafb",
+    "theme_color": "#3b82f6",
+    "icons": [
+        {
+            "src": "data:image/svg+xml,<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 100 100'><text y='.9em' font-size='90'>🗳️</text></svg>",
+            "sizes": "192x192",
+            "type": "image/svg+xml"
+        },
+        {
+            "src": "data:image/svg+xml,<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 100 100'><text y='.9em' font-size='90'>🗳️</text></svg>",
+            "sizes": "512x512",
+            "type": "image/svg+xml"
+        }
+    ]
+})
 
 @app.route("/manifest.json")
 def manifest():
     """PWA manifest"""
-    return jsonify({
-        "name": "Modern Voting App",
-        "short_name": "VoteApp",
-        "description": "A modern voting application with real-time results",
-        "start_url": "/",
-        "display": "standalone",
-        "background_color": "#f9fafb",
-        "theme_color": "#3b82f6",
-        "icons": [
-            {
-                "src": "data:image/svg+xml,<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 100 100'><text y='.9em' font-size='90'>🗳️</text></svg>",
-                "sizes": "192x192",
-                "type": "image/svg+xml"
-            },
-            {
-                "src": "data:image/svg+xml,<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 100 100'><text y='.9em' font-size='90'>🗳️</text></svg>",
-                "sizes": "512x512",
-                "type": "image/svg+xml"
-            }
-        ]
-    })
+    resp = Response(_MANIFEST_BODY, mimetype='application/json')
+    resp.headers['Cache-Control'] = 'public, max-age=86400, immutable'
+    return resp
 
-@app.route("/offline.html")
-def offline():
-    """Offline page for PWA"""
-    return """
+_OFFLINE_HTML = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -305,11 +446,14 @@ def offline():
     </html>
     """
 
-@app.errorhandler(404)
-def not_found(error):
-    """Custom 404 page"""
-    logger.warning(f"404 error: {request.url}")
-    return render_template_string("""
+@app.route("/offline.html")
+def offline():
+    """Offline page for PWA"""
+    resp = Response(_OFFLINE_HTML, mimetype='text/html')
+    resp.headers['Cache-Control'] = 'public, max-age=86400'
+    return resp
+
+_HTML_404 = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -375,13 +519,15 @@ def not_found(error):
         </main>
     </body>
     </html>
-    """), 404
+    """
 
-@app.errorhandler(500)
-def internal_error(error):
-    """Custom 500 page"""
-    logger.error(f"Internal server error: {error}")
-    return render_template_string("""
+@app.errorhandler(404)
+def not_found(error):
+    """Custom 404 page"""
+    logger.warning(f"404 error: {request.url}")
+    return _HTML_404, 404
+
+_HTML_500 = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -447,7 +593,14 @@ def internal_error(error):
         </main>
     </body>
     </html>
-    """), 500
+    """
+
+@app.errorhandler(500)
+def internal_error(error):
+    """Custom 500 page"""
+    logger.error(f"Internal server error: {error}")
+    return _HTML_500, 500
 
 if __name__ == "__main__":
-    app.run(host='0.0.0.0', port=80, debug=True, threaded=True)
+    # Local development only; the container runs gunicorn (see gunicorn.conf.py)
+    app.run(host='0.0.0.0', port=80, debug=os.getenv('FLASK_DEBUG') == '1', threaded=True)
@@ -0,0 +1,25 @@
+# Gunicorn settings for the vote app; picked up automatically from the working directory
+import multiprocessing
+import os
+
+bind = "0.0.0.0:80"
+
+# Threaded workers: requests mostly wait on Redis and PostgreSQL. The default worker
+# count follows the CPUs this container may run on, capped because each worker keeps
+# its own PostgreSQL connection open
+try:
+    _cpus = len(os.sched_getaffinity(0))
+except AttributeError:  # not available on every platform
+    _cpus = multiprocessing.cpu_count()
+worker_class = "gthread"
+workers = int(os.getenv("GUNICORN_WORKERS", min(_cpus * 2 + 1, 8)))
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+
+# The app is imported in each worker (no preload_app), so every worker opens its own
+# Redis and PostgreSQL connections rather than sharing sockets across a fork
+timeout = 30
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")